@@ -0,0 +1,20 @@
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        # CONCURRENTLY darf nicht in einer Transaktion laufen
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bestellungen_bestelldatum
+                ON bestellungen (bestelldatum DESC);
+            """))
+            conn.execute(text("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bestellpositionen_bestellung_id
+                ON bestellpositionen (bestellung_id);
+            """))
+
+        print("✅ Indizes wurden angelegt!")
+
+    except Exception as e:
+        print("⚠️ Fehler:", e)
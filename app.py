@@ -8,21 +8,30 @@
 
 
 import os
-import json
 import logging
+import click
+import orjson
+from collections import defaultdict
 from datetime import datetime
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 
 from flask import (
     Flask, render_template, request,
     redirect, flash, abort,
-    session, url_for, jsonify
+    session, url_for, jsonify, make_response
 )
+from flask.json.provider import JSONProvider
 
 from flask_sqlalchemy import SQLAlchemy
+from flask_session import Session
+import redis
 from flask_wtf.csrf import CSRFProtect
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
@@ -36,7 +45,10 @@ from models import db, Bestellung, BestellPosition, NewsletterSubscriber
 
 from datetime import timedelta
 
-from functools import lru_cache
+from functools import lru_cache, wraps
+from threading import RLock
+
+from cachetools import TTLCache
 
 import re
 
@@ -49,7 +61,21 @@ import re
 
 load_dotenv()
 
+
+class ORJSONProvider(JSONProvider):
+    """JSON für jsonify, request.get_json und die Session über orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj, default=str, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 limiter = Limiter(get_remote_address, app=app)
 
 PAYPAL_WEBHOOK_ID = os.environ.get("PAYPAL_WEBHOOK_ID")
@@ -69,6 +95,14 @@ app.config["SESSION_COOKIE_SECURE"] = os.getenv("FLASK_ENV") == "production"
 app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 app.config["SESSION_PERMANENT"] = False
 
+# Mit Redis liegt die Session (inkl. Warenkorb) serverseitig,
+# das Cookie enthält nur noch die Session-ID
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    app.config["SESSION_TYPE"] = "redis"
+    app.config["SESSION_REDIS"] = redis.from_url(REDIS_URL)
+    Session(app)
+
 app.config["PAYPAL_CLIENT_ID"] = PAYPAL_CLIENT_ID
 
 
@@ -82,10 +116,22 @@ database_url = database_url.replace("postgres://", "postgresql://")
 
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# gevent-Worker bedienen viele Requests gleichzeitig → genug DB-Verbindungen
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_pre_ping": True,
+}
 
 db.init_app(app)
-with app.app_context():
+
+
+# Tabellen einmal pro Deploy anlegen statt bei jedem Import (jeder Worker,
+# jedes Skript) die Datenbank abzugleichen: `flask --app app init-db`
+@app.cli.command("init-db")
+def init_db():
     db.create_all()
+    click.echo("✅ Tabellen angelegt")
 
 
 
@@ -97,9 +143,20 @@ ADMIN_PASSWORD = os.getenv("FLASK_ADMIN_PASSWORD")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 EMAIL_SENDER = os.getenv("EMAIL_SENDER")
 
+# Emails laufen im Hintergrund, damit kein Request auf SendGrid wartet
+EMAIL_POOL = ThreadPoolExecutor(max_workers=4)
+EMAIL_MAX_VERSUCHE = 3
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ein Client für alle Mails statt pro Versand einen neuen
+SENDGRID_CLIENT = None
+if SENDGRID_API_KEY and EMAIL_SENDER:
+    SENDGRID_CLIENT = SendGridAPIClient(SENDGRID_API_KEY)
+else:
+    logger.warning("SendGrid nicht konfiguriert")
+
 csrf = CSRFProtect(app)
 
 
@@ -117,6 +174,19 @@ BUCHBUTLER_VERKAUFSKANAL_ID = os.getenv("BUCHBUTLER_VERKAUFSKANAL_ID", "1")
 
 BASE_URL = "https://api.buchbutler.de"
 
+# Eine Session für alle Buchbutler-Aufrufe → Verbindungen (TLS) werden wiederverwendet
+BUCHBUTLER_SESSION = requests.Session()
+BUCHBUTLER_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        # Nur Verbindungsfehler wiederholen: ein Read-Timeout würde sonst
+        # pro Versuch erneut bis zu 10 s einen Thread blockieren
+        max_retries=Retry(total=2, connect=2, read=0, backoff_factor=0.1)
+    )
+)
+
 
 
 # =====================================================
@@ -127,10 +197,19 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 json_path = os.path.join(basedir, "produkte.json")
 
 if os.path.exists(json_path):
-    with open(json_path, encoding="utf-8") as f:
-        produkte = json.load(f)
+    with open(json_path, "rb") as f:
+        produkte = tuple(orjson.loads(f.read()))
 else:
-    produkte = []
+    produkte = ()
+
+# Einmalig indizieren statt bei jedem Request die Liste zu durchsuchen
+PRODUKT_BY_ID = {p["id"]: p for p in produkte}
+PRODUKT_BY_EAN = {str(p["ean"]): p for p in produkte if p.get("ean")}
+
+PRODUKTE_BY_KAT = defaultdict(list)
+for p in produkte:
+    PRODUKTE_BY_KAT[p.get("kategorie")].append(p)
+PRODUKTE_BY_KAT = {k: tuple(v) for k, v in PRODUKTE_BY_KAT.items()}
 
 
 # =====================================================
@@ -194,8 +273,8 @@ def logout():
 def inject_user():
     user = None
     if "user_id" in session:
-        user = User.query.get(session["user_id"])
-    return dict(current_user=user)
+        user = db.session.get(User, session["user_id"])
+    return dict(current_user=user, user_email=session.get("user_email"))
 
 
 @app.route("/meine-gutscheine")
@@ -226,7 +305,7 @@ def update_user_punkte_und_gutschein(user, cart_items):
 
         send_email(
             subject="Dein Gutschein 🎁",
-            body=f"Dein Code: {code}",
+            html=f"Dein Code: {code}",
             recipient=user.email
         )
 
@@ -252,7 +331,7 @@ def paypal_access_token():
 @csrf.exempt
 def create_paypal_order():
     cart_items = get_cart()
-    total = calculate_total(cart_items)
+    total = get_cart_total()
 
     if not cart_items or total <= 0:
         return jsonify({"error": "Warenkorb leer"}), 400
@@ -285,6 +364,17 @@ def create_paypal_order():
 @app.route("/capture-paypal-order/<order_id>", methods=["POST"])
 @csrf.exempt
 def capture_paypal_order(order_id):
+    # Erst prüfen, dann kassieren und speichern – kein Capture/Rollback für
+    # Bestellungen, die ohnehin nicht angelegt werden können
+    cart_items = list(get_cart().values())
+
+    if (
+        not cart_items
+        or not all(ist_gueltige_position(item) for item in cart_items)
+        or not session.get("checkout_email")
+    ):
+        return jsonify({"status": "error", "message": "Warenkorb oder Kundendaten fehlen"}), 400
+
     try:
         access_token = paypal_access_token()
 
@@ -301,8 +391,6 @@ def capture_paypal_order(order_id):
         if data.get("status") != "COMPLETED":
             return jsonify({"status": "error", "message": "PayPal-Zahlung nicht abgeschlossen", "data": data}), 400
 
-        cart_items = get_cart()
-
         bestellung = Bestellung(
             email=session.get("checkout_email"),
             vorname=session.get("checkout_vorname"),
@@ -319,15 +407,17 @@ def capture_paypal_order(order_id):
         db.session.add(bestellung)
         db.session.flush()
 
-        for item in cart_items:
-            db.session.add(
-                BestellPosition(
-                    bestellung_id=bestellung.id,
-                    bezeichnung=item["title"],
-                    menge=item["quantity"],
-                    preis=item["price"]
-                )
-            )
+        # Alle Positionen mit einem einzigen INSERT schreiben
+        positionen = [
+            {
+                "bestellung_id": bestellung.id,
+                "bezeichnung": item["title"],
+                "menge": item["quantity"],
+                "preis": item["price"]
+            }
+            for item in cart_items
+        ]
+        db.session.execute(BestellPosition.__table__.insert(), positionen)
 
         db.session.commit()
 
@@ -338,6 +428,7 @@ def capture_paypal_order(order_id):
 
         # Warenkorb leeren
         session.pop("cart", None)
+        session.pop("cart_total", None)
 
         return jsonify({"status": "success", "order_id": order_id})
 
@@ -375,7 +466,7 @@ def verify_webhook(headers, body):
 def paypal_webhook():
 
     body = request.get_data(as_text=True)
-    event = json.loads(body)
+    event = orjson.loads(body)
     headers = request.headers
 
     if not verify_webhook(headers, body):
@@ -387,7 +478,7 @@ def paypal_webhook():
         capture = event["resource"]
         order_id = capture["supplementary_data"]["related_ids"]["order_id"]
         amount = capture["amount"]["value"]
-        logger.info(f"PayPal Zahlung abgeschlossen: {order_id} – {amount} EUR")
+        logger.info("PayPal Zahlung abgeschlossen: %s – %s EUR", order_id, amount)
 
 
 
@@ -398,15 +489,51 @@ def paypal_webhook():
 # HILFSFUNKTIONEN
 # =====================================================
 
+def cart_key(ean):
+    return str(ean)
+
 def get_cart():
-    return session.get("cart", [])
+    """Warenkorb als Dict {EAN: Position}"""
+    cart = session.get("cart", {})
+
+    # Alte Sessions speichern den Warenkorb noch als Liste
+    if isinstance(cart, list):
+        cart = {cart_key(item.get("ean")): item for item in cart}
+
+    return cart
 
 def save_cart(cart):
     session["cart"] = cart
+    # Summe nur bei Änderungen neu berechnen, Lesezugriffe nutzen den Wert
+    session["cart_total"] = calculate_total(cart)
     session.modified = True
 
 def calculate_total(cart):
-    return sum(item["price"] * item["quantity"] for item in cart)
+    items = cart.values() if isinstance(cart, dict) else cart
+    return sum(item["price"] * item["quantity"] for item in items)
+
+def ist_gueltige_position(item):
+    """Prüft, ob eine Warenkorb-Position alle Felder für Summe und Bestellung hat"""
+    if not isinstance(item, dict):
+        return False
+
+    price = item.get("price")
+    quantity = item.get("quantity")
+
+    return (
+        cart_key(item.get("ean")) in PRODUKT_BY_EAN
+        and isinstance(item.get("title"), str)
+        and isinstance(price, (int, float)) and not isinstance(price, bool)
+        and price > 0
+        and isinstance(quantity, int) and not isinstance(quantity, bool)
+        and quantity >= 1
+    )
+
+def get_cart_total():
+    total = session.get("cart_total")
+    if total is None:
+        total = calculate_total(get_cart())
+    return total
 
 
 def check_auth():
@@ -450,7 +577,7 @@ def buchbutler_request(endpoint, ean):
         "ean": ean
     }
 
-    response = requests.get(url, params=params, timeout=10)
+    response = BUCHBUTLER_SESSION.get(url, params=params, timeout=10)
     response.raise_for_status()
 
     data = response.json()
@@ -463,10 +590,32 @@ def buchbutler_request(endpoint, ean):
 # CONTENT API
 # -----------------------------
 
-@lru_cache(maxsize=128)
-def cached_lade_produkt_von_api(ean):
-    return lade_produkt_von_api(ean)
+_PRODUKT_CACHE = TTLCache(maxsize=4096, ttl=3600)
+_BESTAND_CACHE = TTLCache(maxsize=4096, ttl=60)  # Bestand ändert sich schneller
+_CACHE_LOCK = RLock()
 
+
+def ttl_cached(cache):
+    """Cacht API-Ergebnisse pro EAN – Fehler (None) werden nicht gecacht"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(ean):
+            with _CACHE_LOCK:
+                result = cache.get(ean)
+            if result is not None:
+                return result
+
+            result = func(ean)
+
+            if result is not None:
+                with _CACHE_LOCK:
+                    cache[ean] = result
+            return result
+        return wrapper
+    return decorator
+
+
+@ttl_cached(_PRODUKT_CACHE)
 def lade_produkt_von_api(ean):
     """Lädt Produktdaten von CONTENT API"""
 
@@ -515,6 +664,7 @@ def lade_produkt_von_api(ean):
 # MOVEMENT API
 # -----------------------------
 
+@ttl_cached(_BESTAND_CACHE)
 def lade_bestand_von_api(ean):
     """Lädt Bestand / Preis / Lieferdaten"""
 
@@ -546,6 +696,25 @@ def lade_bestand_von_api(ean):
         logger.exception("Fehler beim Laden von MOVEMENT API")
         return None
 
+# -----------------------------
+# MEHRERE EANS PARALLEL
+# -----------------------------
+
+BUCHBUTLER_MAX_WORKERS = 8  # <= pool_maxsize der BUCHBUTLER_SESSION
+BUCHBUTLER_TIMEOUT = 10
+
+
+def lade_produkte_bulk(eans):
+    """Lädt Produktdaten für mehrere EANs parallel"""
+    with ThreadPoolExecutor(max_workers=BUCHBUTLER_MAX_WORKERS) as ex:
+        return list(ex.map(lade_produkt_von_api, eans))
+
+
+def lade_bestaende_bulk(eans):
+    """Lädt Bestand / Preis für mehrere EANs parallel"""
+    with ThreadPoolExecutor(max_workers=BUCHBUTLER_MAX_WORKERS) as ex:
+        return list(ex.map(lade_bestand_von_api, eans))
+
 # -----------------------------
 # Bestellung an Buchbutler senden 
 # -----------------------------
@@ -612,7 +781,7 @@ def sende_bestellung_an_buchbutler(bestellung, cart_items):
             "pos_referenz": f"{bestellung.id}-{i}"
         })
     
-    response = requests.post(url, json=payload, timeout=20)
+    response = BUCHBUTLER_SESSION.post(url, json=payload, timeout=20)
     
     data = response.json()
     
@@ -636,11 +805,11 @@ def buchbutler_orderresponse(collectkey):
     }
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = BUCHBUTLER_SESSION.post(url, json=payload, timeout=10)
 
         # Wenn keine erfolgreiche Antwort
         if response.status_code != 200:
-            logger.warning(f"ORDERRESPONSE Statuscode: {response.status_code}")
+            logger.warning("ORDERRESPONSE Statuscode: %s", response.status_code)
             return None
 
         # Wenn Antwort leer ist
@@ -660,8 +829,8 @@ def buchbutler_orderresponse(collectkey):
 # Admin Test
 @app.route("/admin-test")
 def admin_test():
-    alle = Bestellung.query.all()
-    return {"anzahl_bestellungen": len(alle)}
+    anzahl = db.session.scalar(db.select(db.func.count(Bestellung.id)))
+    return {"anzahl_bestellungen": anzahl}
 
 
 
@@ -690,6 +859,8 @@ def admin_login():
 
 # Admin Bestellungen anzeigen
 
+ADMIN_BESTELLUNGEN_PRO_SEITE = 50
+
 
 
 
@@ -700,7 +871,16 @@ def admin_bestellungen():
     if resp:
         return resp
 
-    alle = Bestellung.query.order_by(Bestellung.bestelldatum.desc()).all()
+    seite = request.args.get("seite", 1, type=int)
+
+    # Positionen kommen per lazy="selectin" in einer IN-Abfrage mit (kein N+1
+    # im Template), Bestellungen seitenweise statt die ganze Tabelle auf einmal
+    pagination = (
+        Bestellung.query
+        .order_by(Bestellung.bestelldatum.desc())
+        .paginate(page=seite, per_page=ADMIN_BESTELLUNGEN_PRO_SEITE, error_out=False)
+    )
+    alle = pagination.items
 
     for b in alle:
 
@@ -744,13 +924,18 @@ def admin_bestellungen():
                 b.paketart = None
                 b.eans = None
 
+    # Erst rendern, dann committen: der Commit lässt alle Bestellungen und
+    # Positionen verfallen, das Template würde sie sonst einzeln nachladen
+    html = render_template(
+        "admin_bestellungen.html",
+        bestellungen=alle,
+        pagination=pagination
+    )
+
     # Commit nach allen Updates
     db.session.commit()
 
-    return render_template(
-        "admin_bestellungen.html",
-        bestellungen=alle
-    )
+    return html
 
 
 @app.route("/admin/sync-buchbutler/<int:index>")
@@ -766,7 +951,7 @@ def sync_buchbutler(index):
     ean = produkt.get("ean")
 
     if ean:
-        print("SYNC:", ean)
+        logger.debug("SYNC: %s", ean)
 
         api = lade_produkt_von_api(ean)
         movement = lade_bestand_von_api(ean)
@@ -779,8 +964,8 @@ def sync_buchbutler(index):
             produkt["preis"] = movement.get("preis")
 
         # sofort speichern → kein RAM Wachstum
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(produkte, f, ensure_ascii=False, indent=2)
+        with open(json_path, "wb") as f:
+            f.write(orjson.dumps(produkte, option=orjson.OPT_INDENT_2))
 
     next_index = index + 1
 
@@ -821,10 +1006,7 @@ for p in produkte:
 @app.route('/produkt/<int:produkt_id>/<slug>')
 def produkt_detail(produkt_id, slug):
 
-    lokale_daten = next(
-        (p.copy() for p in produkte if p["id"] == produkt_id),
-        None
-    )
+    lokale_daten = PRODUKT_BY_ID.get(produkt_id)
 
     if not lokale_daten:
         abort(404)
@@ -845,26 +1027,72 @@ def produkt_detail(produkt_id, slug):
     if not ean:
         abort(404)
 
-    produkt = cached_lade_produkt_von_api(ean)
-
-    if not produkt:
-        abort(404)
-
-    movement = lade_bestand_von_api(ean)
+    # CONTENT und MOVEMENT sind unabhängig → gleichzeitig abfragen.
+    # Eigener Executor pro Request (unter gevent billig), damit kein Request
+    # in der Warteschlange eines anderen steht
+    ex = ThreadPoolExecutor(max_workers=2)
+    f_produkt = ex.submit(lade_produkt_von_api, ean)
+    f_bestand = ex.submit(lade_bestand_von_api, ean)
+    ex.shutdown(wait=False)
+
+    fertig, _ = wait((f_produkt, f_bestand), timeout=BUCHBUTLER_TIMEOUT)
+
+    if f_produkt in fertig:
+        api_produkt = f_produkt.result()
+        if not api_produkt:
+            abort(404)
+    else:
+        # API hängt → Seite mit den lokalen Katalogdaten statt 404
+        logger.warning("Buchbutler CONTENT Timeout für EAN %s", ean)
+        api_produkt = None
+
+    # Eigene Kopie pro Request – das API-Ergebnis liegt im geteilten Cache
+    produkt = dict(api_produkt or {})
+
+    movement = f_bestand.result() if f_bestand in fertig else None
     if movement:
         produkt.update(movement)
 
     produkt.update(lokale_daten)
 
+    # Ohne CONTENT-Daten nur mit einem echten Preis anzeigen –
+    # sonst stünde das Buch für 0,00 € im Shop
+    if api_produkt is None and not produkt.get("preis"):
+        abort(503)
+
     produkt.setdefault("bestand", "n/a")
     produkt.setdefault("preis", 0)
     produkt.setdefault("handling_zeit", "n/a")
     produkt.setdefault("erfuellungsrate", "n/a")
 
-    return render_template(
+    response = make_response(render_template(
         "produkt.html",
         produkt=produkt
-    )
+    ))
+
+    # Nur cachen, wenn CONTENT und MOVEMENT geantwortet haben –
+    # eine Notseite soll nicht nach der Störung weiter ausgeliefert werden
+    if api_produkt is None or movement is None:
+        response.headers["Cache-Control"] = "no-store"
+
+    return response
+
+
+# Produktseiten sind für alle Besucher gleich (kein CSRF-Token, kein Login)
+# → Browser/CDN dürfen kurz cachen, danach reicht ein 304
+CACHEBARE_ENDPOINTS = {"produkt_detail"}
+
+@app.after_request
+def add_cache_headers(response):
+    if (
+        request.endpoint in CACHEBARE_ENDPOINTS
+        and response.status_code == 200
+        and "Cache-Control" not in response.headers
+    ):
+        response.headers["Cache-Control"] = "public, max-age=60"
+        response.add_etag()
+        return response.make_conditional(request)
+    return response
 
 # ============================
 # CART ROUTES
@@ -873,7 +1101,7 @@ def produkt_detail(produkt_id, slug):
 @app.route("/add-to-cart", methods=["POST"])
 def add_to_cart():
     produkt_id = int(request.form.get("produkt_id"))
-    produkt = next((p for p in produkte if p["id"] == produkt_id), None)
+    produkt = PRODUKT_BY_ID.get(produkt_id)
 
     if not produkt:
         abort(404)
@@ -888,25 +1116,20 @@ def add_to_cart():
             produkt.update(movement)
 
     cart = get_cart()
+    key = cart_key(produkt["ean"])
 
-    found = False
-    for item in cart:
-        if item["id"] == produkt_id:
-            item["quantity"] += 1
-            found = True
-            break
-
-  
-
-    if not found:
-        cart.append({
+    item = cart.get(key)
+    if item:
+        item["quantity"] += 1
+    else:
+        cart[key] = {
             "id": produkt["id"],
             "title": produkt["name"],
             "price": produkt.get("preis", 0),
             "quantity": 1,
             "ean": produkt["ean"]
-        })
-        
+        }
+
 
     save_cart(cart)
     return redirect(url_for("cart"))
@@ -916,13 +1139,15 @@ def add_to_cart():
 @app.route("/cart")
 def cart():
     cart_items = get_cart()
-    total = calculate_total(cart_items)
+    total = get_cart_total()
     return render_template("cart.html", cart_items=cart_items, total=total)
 
-@app.route("/remove-from-cart/<int:produkt_id>")
+@app.route("/remove-from-cart/<int:produkt_id>", methods=["POST"])
 def remove_from_cart(produkt_id):
     cart = get_cart()
-    cart = [item for item in cart if item["id"] != produkt_id]
+    produkt = PRODUKT_BY_ID.get(produkt_id)
+    if produkt:
+        cart.pop(cart_key(produkt.get("ean")), None)
     save_cart(cart)
     return redirect(url_for("cart"))
 
@@ -930,15 +1155,25 @@ def remove_from_cart(produkt_id):
 @app.route("/sync-cart", methods=["POST"])
 @csrf.exempt  
 def sync_cart():
-    data = request.get_json()
+    data = request.get_json(silent=True)
 
-    if not data:
+    if not data or not isinstance(data, list):
         return {"status": "error"}, 400
 
-    session["cart"] = data
-    session.modified = True
+    if not all(ist_gueltige_position(item) for item in data):
+        return {"status": "error"}, 400
 
-    print("SYNCED CART:", session["cart"])
+    # Preis nicht vom Browser übernehmen, sondern serverseitig bestimmen
+    eans = [cart_key(item["ean"]) for item in data]
+    for item, ean, movement in zip(data, eans, lade_bestaende_bulk(eans)):
+        preis = (movement or {}).get("preis") or to_float(PRODUKT_BY_EAN[ean].get("preis"))
+        if preis <= 0:
+            return {"status": "error"}, 400
+        item["price"] = preis
+
+    save_cart({cart_key(item.get("ean")): item for item in data})
+
+    logger.debug("SYNCED CART: %s", session["cart"])
 
     return {"status": "ok"}
     
@@ -949,7 +1184,7 @@ def sync_cart():
 @app.route("/checkout", methods=["GET", "POST"])
 def checkout():
     cart_items = get_cart()
-    total = calculate_total(cart_items)
+    total = get_cart_total()
 
     logger.info("Checkout gestartet")
 
@@ -964,7 +1199,7 @@ def checkout():
 
          # Kunde erfassen / Punkte vergeben
         if "user_id" in session:
-            user = User.query.get(session["user_id"])
+            user = db.session.get(User, session["user_id"])
             punkte = int(total)  # Beispiel: 1€ = 1 Punkt
             user.punkte += punkte
 
@@ -976,7 +1211,7 @@ def checkout():
                 db.session.add(gutschein)
                 send_email(
                     subject="Dein Gutschein 🎁",
-                    body=f"Dein Code: {code}",
+                    html=f"Dein Code: {code}",
                     recipient=user.email
                 )
             db.session.commit()
@@ -995,8 +1230,8 @@ def checkout():
 
             logger.info("Kundendaten für PayPal gespeichert")
 
-        except Exception as e:
-            logger.error(f"Checkout Fehler: {e}")
+        except Exception:
+            logger.exception("Checkout Fehler")
             flash("Fehler beim Checkout.", "error")
             return redirect(url_for("checkout"))
 
@@ -1012,7 +1247,7 @@ def checkout():
 
 @app.route("/kontakt")  
 def kontakt():
-    return render_template("kontakt.html", user_email=session.get("user_email"))
+    return render_template("kontakt.html")
 
 @app.route("/submit", methods=["POST"])
 @csrf.exempt
@@ -1043,25 +1278,37 @@ def submit():
 # ============================
 
 
-def send_email(subject, recipient, html, plain_text=None):
-    if not SENDGRID_API_KEY or not EMAIL_SENDER:
-        logger.warning("SendGrid nicht konfiguriert")
+def _send_email_sync(subject, recipient, html, plain_text=None):
+    # Läuft im EMAIL_POOL: Fehler landen sonst unbemerkt im Future
+    try:
+        message = Mail(
+            from_email=EMAIL_SENDER,
+            to_emails=recipient,
+            subject=subject,
+            html_content=html,
+            plain_text_content=plain_text
+        )
+    except Exception:
+        logger.exception("Email konnte nicht erstellt werden")
         return
 
-    message = Mail(
-        from_email=EMAIL_SENDER,
-        to_emails=recipient,
-        subject=subject,
-        html_content=html,
-        plain_text_content=plain_text
-    )
+    for versuch in range(1, EMAIL_MAX_VERSUCHE + 1):
+        try:
+            SENDGRID_CLIENT.send(message)
+            return
+        except Exception:
+            if versuch == EMAIL_MAX_VERSUCHE:
+                logger.exception("Email Versand fehlgeschlagen")
+                return
+            time.sleep(2 ** versuch)
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
 
-    try:
-        sg.send(message)
-    except Exception:
-        logger.exception("Email Versand fehlgeschlagen")
+def send_email(subject, recipient, html, plain_text=None):
+    """Stellt eine Email in die Warteschlange, ohne den Request zu blockieren"""
+    if not SENDGRID_CLIENT:
+        return
+
+    EMAIL_POOL.submit(_send_email_sync, subject, recipient, html, plain_text)
 
 
 @app.route("/admin/newsletter")
@@ -1069,8 +1316,14 @@ def admin_newsletter():
     if not session.get("admin"):
         abort(403)
 
-    subscribers = NewsletterSubscriber.query.order_by(
-        NewsletterSubscriber.created_at.desc()
+    # Nur die angezeigten Spalten laden, ohne ORM-Objekte zu erzeugen
+    subscribers = db.session.execute(
+        db.select(
+            NewsletterSubscriber.id,
+            NewsletterSubscriber.email,
+            NewsletterSubscriber.confirmed,
+            NewsletterSubscriber.created_at
+        ).order_by(NewsletterSubscriber.created_at.desc())
     ).all()
 
     return render_template(
@@ -1163,7 +1416,10 @@ def send_newsletter():
     subject = request.form.get("subject")
     content = request.form.get("content")  # HTML erlaubt
 
-    subscribers = NewsletterSubscriber.query.filter_by(confirmed=True).all()
+    subscribers = db.session.execute(
+        db.select(NewsletterSubscriber.email, NewsletterSubscriber.token)
+        .filter_by(confirmed=True)
+    ).all()
 
     for sub in subscribers:
         unsubscribe_url = url_for(
@@ -1205,20 +1461,34 @@ def unsubscribe_newsletter(token):
     flash("Du hast dich erfolgreich vom Newsletter abgemeldet.", "success")
     return redirect("/")
 # ============================
+# STATISCHE SEITEN
+# ============================
+
+@lru_cache(maxsize=32)
+def _render_statisch_cached(template):
+    return render_template(template)
+
+def render_statisch(template):
+    """Rendert Seiten ohne Formulare für Gäste nur einmal pro Prozess"""
+    if app.debug or "user_id" in session or "user_email" in session:
+        return render_template(template)
+    return _render_statisch_cached(template)
+
+# ============================
 # RECHTLICHES
 # ============================
 
 @app.route("/agb")
 def agb():
-    return render_template("agb.html", user_email=session.get("user_email"))
+    return render_statisch("agb.html")
 
 @app.route("/datenschutz")
 def datenschutz():
-    return render_template("datenschutz.html", user_email=session.get("user_email"))
+    return render_statisch("datenschutz.html")
 
 @app.route("/impressum")
 def impressum():
-    return render_template("impressum.html", user_email=session.get("user_email"))
+    return render_statisch("impressum.html")
 
 
 
@@ -1228,55 +1498,52 @@ def impressum():
 
 @app.route("/danke")
 def danke():
-    return render_template("danke.html", user_email=session.get("user_email"))
+    return render_statisch("danke.html")
 
 @app.route("/kontaktdanke")
 def kontaktdanke():
-    return render_template("kontaktdanke.html", user_email=session.get("user_email"))
+    return render_statisch("kontaktdanke.html")
 
 @app.route("/bestelldanke")
 def bestelldanke():
-    return render_template("bestelldanke.html", user_email=session.get("user_email"))
+    return render_statisch("bestelldanke.html")
 
 @app.route("/newsletterbesteatigung")
 def newsletterbesteatigung():
-    return render_template("newsletterbesteatigung.html", user_email=session.get("user_email"))
+    return render_statisch("newsletterbesteatigung.html")
     
 @app.route("/newsletteranmeldung")
 def newsletteranmeldung():
-    return render_template("newsletteranmeldung.html", user_email=session.get("user_email"))
+    return render_template("newsletteranmeldung.html")
     
 # ============================
 # INDEX HAUPTSEITE
 # ============================
 
-@app.route("/")
-def index():
+KATEGORIENAMEN = (
+    "Jacominus Gainsborough", "Mut oder Angst?!",
+    "Klassiker", "Monstergeschichten",
+    "Wichtige Fragen", "Weihnachten",
+    "Kinder und Gefühle", "Dazugehören"
+)
 
-    kategorienamen = [
-        "Jacominus Gainsborough", "Mut oder Angst?!",
-        "Klassiker", "Monstergeschichten",
-        "Wichtige Fragen", "Weihnachten",
-        "Kinder und Gefühle", "Dazugehören"
-    ]
-
-    kategorie_beschreibungen = {
-        "Jacominus Gainsborough": {
-            "kurz": "Einer, der sich erinnert. Und manchmal auch vergisst.",
-            "lang": "Jacominus sitzt im Garten, denkt nach, lauscht dem Wind. Eine Erinnerung streift ihn – kaum greifbar, wie ein Traum, der sich beim Aufwachen auflöst. Und doch ist da etwas, das bleibt: ein Gefühl, warm und vertraut. Es sind die winzig kleinen Sekunden, die zählen. Die kaum sichtbaren Augenblicke zwischen zwei Herzschlägen, in denen sich alles entscheiden kann. Ein Blick. Ein Lächeln. Ein Wiedersehen. Und irgendwo ist immer jemand unterwegs. Über Wiesen, durch Straßen, vorbei an flüchtigen Begegnungen. Schritt für Schritt, einer Verabredung entgegen. Vielleicht Punkt zwölf. Vielleicht genau im richtigen Moment. So entfaltet sich ein Leben – nicht laut und in Bildern und Worten, die bleiben. In Begegnungen, die alles verändern können. Kein außergewöhnliches Leben. Und doch ein ganz besonderes. Das Leben von Jacominus Gainsborough"
-        }
+KATEGORIE_BESCHREIBUNGEN = {
+    "Jacominus Gainsborough": {
+        "kurz": "Einer, der sich erinnert. Und manchmal auch vergisst.",
+        "lang": "Jacominus sitzt im Garten, denkt nach, lauscht dem Wind. Eine Erinnerung streift ihn – kaum greifbar, wie ein Traum, der sich beim Aufwachen auflöst. Und doch ist da etwas, das bleibt: ein Gefühl, warm und vertraut. Es sind die winzig kleinen Sekunden, die zählen. Die kaum sichtbaren Augenblicke zwischen zwei Herzschlägen, in denen sich alles entscheiden kann. Ein Blick. Ein Lächeln. Ein Wiedersehen. Und irgendwo ist immer jemand unterwegs. Über Wiesen, durch Straßen, vorbei an flüchtigen Begegnungen. Schritt für Schritt, einer Verabredung entgegen. Vielleicht Punkt zwölf. Vielleicht genau im richtigen Moment. So entfaltet sich ein Leben – nicht laut und in Bildern und Worten, die bleiben. In Begegnungen, die alles verändern können. Kein außergewöhnliches Leben. Und doch ein ganz besonderes. Das Leben von Jacominus Gainsborough"
     }
+}
 
-    kategorien = [
-        (k, [p for p in produkte if p.get("kategorie") == k])
-        for k in kategorienamen
-    ]
+# Katalog ändert sich nur mit einem Deploy → einmal beim Start zusammenstellen
+KATEGORIEN = tuple((k, PRODUKTE_BY_KAT.get(k, ())) for k in KATEGORIENAMEN)
 
+
+@app.route("/")
+def index():
     return render_template(
         "index.html",
-        kategorien=kategorien,
-        kategorie_beschreibungen=kategorie_beschreibungen,
-        user_email=session.get("user_email")
+        kategorien=KATEGORIEN,
+        kategorie_beschreibungen=KATEGORIE_BESCHREIBUNGEN
     )
 
 # =====================================================
@@ -1284,4 +1551,6 @@ def index():
 # =====================================================
 
 if __name__ == "__main__":
+    with app.app_context():
+        db.create_all()
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
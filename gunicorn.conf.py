@@ -0,0 +1,9 @@
+# gunicorn.conf.py
+# Wird von gunicorn automatisch aus dem Arbeitsverzeichnis geladen
+
+
+def post_fork(server, worker):
+    # psycopg2 blockiert sonst bei jeder DB-Abfrage den gevent-Hub
+    # und damit alle Greenlets des Workers
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
@@ -1,11 +1,11 @@
 import os
-import json
+import orjson
 from app import app, db, Produkt, json_path
 
 with app.app_context():
     if os.path.exists(json_path):
-        with open(json_path, encoding="utf-8") as f:
-            produkte = json.load(f)
+        with open(json_path, "rb") as f:
+            produkte = orjson.loads(f.read())
 
         for p in produkte:
             ean = p.get("ean")
@@ -87,19 +87,21 @@ class Bestellung(db.Model):
     bestelldatum = db.Column(
         db.DateTime,
         default=datetime.utcnow,
-        nullable=False
+        nullable=False,
+        index=True
     )
     positionen = db.relationship(
         "BestellPosition",
         backref="bestellung",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="selectin"
     )
 
 class BestellPosition(db.Model):
     __tablename__ = "bestellpositionen"
 
     id = db.Column(db.Integer, primary_key=True)
-    bestellung_id = db.Column(db.Integer, db.ForeignKey("bestellungen.id"))
+    bestellung_id = db.Column(db.Integer, db.ForeignKey("bestellungen.id"), index=True)
     ean = db.Column(db.String(50))
     bezeichnung = db.Column(db.String(200))
     menge = db.Column(db.Integer)
@@ -1,14 +1,17 @@
 # sync_buchbutler.py
 import os
-from app import app, db, lade_produkt_von_api, lade_bestand_von_api
+from app import app, db, lade_produkte_bulk, lade_bestaende_bulk
 from models import Produkt
 
 with app.app_context():
     alle_produkte = Produkt.query.all()
-    for produkt in alle_produkte:
-        api = lade_produkt_von_api(produkt.ean)
-        movement = lade_bestand_von_api(produkt.ean)
+    eans = [produkt.ean for produkt in alle_produkte]
 
+    # Alle EANs parallel abfragen statt nacheinander
+    apis = lade_produkte_bulk(eans)
+    movements = lade_bestaende_bulk(eans)
+
+    for produkt, api, movement in zip(alle_produkte, apis, movements):
         if api:
             produkt.name = api.get("name")
             produkt.autor = api.get("autor")